@@ -1,15 +1,18 @@
 import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
+import plotly.express as px
 import datetime
+import os
+import tempfile
+import time
+import numpy as np
 import requests
-from io import StringIO
-import gspread
-from google.oauth2.service_account import Credentials
-from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+import html
 import folium
-from streamlit_folium import st_folium
-from streamlit_carousel import carousel
+import streamlit.components.v1 as components
 
 # Configuração da página
 st.set_page_config(
@@ -29,9 +32,117 @@ hide_sidebar_button = """
 """
 st.markdown(hide_sidebar_button, unsafe_allow_html=True)
 
+# Únicas colunas que as funções de análise realmente consultam; o resto da
+# planilha nem chega a ser interpretado pelo read_csv
+_CSV_KEEP_COLS = {
+    'obsDt',
+    'subId',
+    'userDisplayName',
+    'speciesCode',
+    'commonName',
+    'scientificName',
+    'familySciName',
+    'taxonOrder',
+}
+
+
+# Converte a coluna de data uma única vez, no carregamento
+def _parse_obs_dt(series):
+    """Converte a coluna obsDt para datetime64 uma única vez no carregamento"""
+    # Formato: "2025-04-13 14:02" conforme visto na nova estrutura
+    parsed = pd.to_datetime(series, errors='coerce', format='%Y-%m-%d %H:%M', cache=True)
+
+    # Se o formato estrito falhar, tenta a detecção automática
+    if parsed.isna().sum() > series.isna().sum():
+        parsed = pd.to_datetime(series, errors='coerce', cache=True)
+
+    return parsed
+
+
+def _prepare_sheet_df(df):
+    """Normaliza um dataframe recém-carregado para uso pelas funções de análise"""
+    if 'obsDt' in df.columns:
+        df['obsDt'] = _parse_obs_dt(df['obsDt'])
+
+        # Mantém o dataframe ordenado por data para permitir busca binária
+        # na filtragem por período (datas inválidas nunca passariam no filtro)
+        df = df.dropna(subset=['obsDt']).sort_values('obsDt').reset_index(drop=True)
+
+        # Versão já formatada para exibição: o strftime linha a linha é uma
+        # das operações mais lentas do pandas, então roda uma única vez aqui
+        # em vez de a cada renderização das tabelas
+        df['obsDt_fmt'] = df['obsDt'].dt.strftime('%d/%m/%Y %H:%M')
+
+    # Colunas de identificadores têm baixa cardinalidade (espécies, observadores,
+    # listas); como category, groupby/nunique/value_counts operam sobre códigos
+    # inteiros em vez de strings, com muito menos memória
+    for col in ('subId', 'userDisplayName', 'speciesCode', 'commonName',
+                'scientificName', 'familySciName'):
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+
+    # taxonOrder só é usado para ordenação numérica: converte uma vez aqui
+    # em vez de a cada chamada de get_all_species
+    if 'taxonOrder' in df.columns:
+        df['taxonOrder'] = pd.to_numeric(df['taxonOrder'], errors='coerce')
+
+    # Chave mensal pré-computada para o histórico de listas: datetime64
+    # truncado no mês, sem o caminho de objetos Period do to_period
+    if 'obsDt' in df.columns:
+        df['_month_year'] = df['obsDt'].values.astype('datetime64[M]').astype('datetime64[ns]')
+
+    return df
+
+
+# Cache em disco: sobrevive a reinícios do processo, ao contrário do
+# st.cache_data, evitando re-baixar e re-converter as abas a cada cold start
+_DISK_CACHE_TTL = 600  # segundos, igual ao ttl do st.cache_data
+
+
+def _disk_cache_path(sheet_id, sheet_name):
+    return os.path.join(tempfile.gettempdir(), f"aegolius_{sheet_id}_{sheet_name}.parquet")
+
+
+def _read_disk_cache(sheet_id, sheet_name):
+    """Lê uma aba do cache em disco, se existir e ainda estiver fresca"""
+    path = _disk_cache_path(sheet_id, sheet_name)
+    try:
+        if os.path.exists(path) and time.time() - os.path.getmtime(path) < _DISK_CACHE_TTL:
+            return pd.read_parquet(path)
+    except Exception:
+        pass  # Cache corrompido ou ilegível: segue para o download normal
+    return None
+
+
+def _write_disk_cache(sheet_id, sheet_name, df):
+    """Grava uma aba já preparada no cache em disco (melhor esforço)"""
+    try:
+        df.to_parquet(_disk_cache_path(sheet_id, sheet_name))
+    except Exception:
+        pass  # Sem espaço ou sem pyarrow: o cache em disco é opcional
+
+
+# Sonda barata de versão da planilha: um HEAD no endpoint de exportação a
+# cada 30s no máximo; enquanto a versão não muda, o cache longo do loader
+# é reaproveitado sem nenhum download de CSV
+@st.cache_data(ttl=30, show_spinner=False)
+def _sheet_revision(sheet_url):
+    try:
+        sheet_id = sheet_url.split('/d/')[1].split('/edit')[0]
+        probe_url = f"https://docs.google.com/spreadsheets/d/{sheet_id}/gviz/tq?tqx=out:csv"
+        resp = requests.head(probe_url, allow_redirects=True, timeout=5)
+        tag = resp.headers.get('ETag') or resp.headers.get('Last-Modified')
+        if tag:
+            return tag
+    except Exception:
+        pass
+    # Sem cabeçalho de versão: janela de tempo equivalente ao TTL antigo
+    return int(time.time() // _DISK_CACHE_TTL)
+
+
 # Função para carregar dados do Google Sheets
-@st.cache_data(ttl=600)  # Cache por 10 minutos
-def load_google_sheet_data(sheet_url):
+@st.cache_data(ttl=3600)  # A revisão na chave invalida quando a planilha muda
+def load_google_sheet_data(sheet_url, revision=None):
     try:
         # Extrai o ID da planilha
         sheet_id = sheet_url.split('/d/')[1].split('/edit')[0]
@@ -47,24 +158,58 @@ def load_google_sheet_data(sheet_url):
 
         sheet_data = {}
 
-        for sheet_name in sheet_names:
+        # Sessão compartilhada entre as threads: reaproveita conexões TLS
+        # com keep-alive em vez de abrir uma nova por aba
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=8, pool_maxsize=8)
+        session.mount('https://', adapter)
+        # CSV comprime bem: pede gzip explicitamente para reduzir os bytes
+        # trafegados por aba
+        session.headers['Accept-Encoding'] = 'gzip, deflate'
+
+        def fetch_sheet(sheet_name):
+            # Tenta o cache em disco antes de ir à rede
+            cached = _read_disk_cache(sheet_id, sheet_name)
+            if cached is not None and len(cached):
+                return cached
+
             try:
                 # Constrói a URL de exportação da aba específica
                 export_url = f"https://docs.google.com/spreadsheets/d/{sheet_id}/gviz/tq?tqx=out:csv&sheet={sheet_name}"
 
-                # Faz a requisição HTTP
-                response = requests.get(export_url)
+                # Faz a requisição HTTP pela sessão compartilhada
+                response = session.get(export_url)
 
                 # Verifica se a requisição foi bem-sucedida
                 if response.status_code == 200:
-                    # Lê o conteúdo como CSV
-                    csv_content = StringIO(response.content.decode('utf-8'))
-                    df = pd.read_csv(csv_content, low_memory=False)
-
-                    if not df.empty:
-                        sheet_data[sheet_name] = df
-            except Exception as e:
+                    # Lê o conteúdo como CSV direto dos bytes (sem a cópia
+                    # do decode para str); o parser do pyarrow é
+                    # multithread, com fallback para o parser em C
+                    csv_content = BytesIO(response.content)
+                    try:
+                        df = pd.read_csv(csv_content, engine='pyarrow')
+                    except (ImportError, ValueError):
+                        csv_content.seek(0)
+                        df = pd.read_csv(csv_content, low_memory=False)
+
+                    # Projeta apenas as colunas usadas pelo painel (o motor
+                    # pyarrow não aceita usecols como função)
+                    df = df[[c for c in df.columns if c in _CSV_KEEP_COLS]]
+
+                    if len(df):
+                        df = _prepare_sheet_df(df)
+                        _write_disk_cache(sheet_id, sheet_name, df)
+                        return df
+            except Exception:
                 pass  # Silenciosamente ignora erros de carregamento de abas
+            return None
+
+        # Baixa todas as abas em paralelo: o tempo total passa a ser o da
+        # aba mais lenta em vez da soma das cinco requisições
+        with ThreadPoolExecutor(max_workers=len(sheet_names)) as executor:
+            for sheet_name, df in zip(sheet_names, executor.map(fetch_sheet, sheet_names)):
+                if df is not None:
+                    sheet_data[sheet_name] = df
 
         return sheet_data
 
@@ -83,13 +228,18 @@ end_date = max_date
 start_datetime = datetime.datetime.combine(start_date, datetime.time.min)
 end_datetime = datetime.datetime.combine(end_date, datetime.time.max)
 
+# Limites do período fixo já como datetime64, prontos para o searchsorted
+# do filtro sem reconversão a cada chamada
+START_NS = np.datetime64(start_datetime, 'ns')
+END_NS = np.datetime64(end_datetime, 'ns')
+
 # Definir URL fixa da planilha
 sheet_url = "https://docs.google.com/spreadsheets/d/1HCfcQXa3nqLxwsF9rok0x1NmaaHJH27TT9JfX9r4qd8/edit?usp=sharing"
 
 # Carregar dados
 if sheet_url and "https://docs.google.com/spreadsheets" in sheet_url:
     with st.spinner("Carregando dados do Google Sheets..."):
-        sheets_data = load_google_sheet_data(sheet_url)
+        sheets_data = load_google_sheet_data(sheet_url, _sheet_revision(sheet_url))
 else:
     st.warning("URL da planilha inválido ou não fornecido.")
     sheets_data = {}
@@ -97,27 +247,22 @@ else:
 # Função para filtrar dados para um período específico
 def filter_data_by_date(df, start_date, end_date, date_column='obsDt'):
     """Filtra dataframe para um período específico, lidando com diferentes formatos de data"""
-    if df.empty or date_column not in df.columns:
+    if len(df) == 0 or date_column not in df.columns:
         return pd.DataFrame()
 
-    # Copia o dataframe para não modificar o original
-    filtered_df = df.copy()
+    # A coluna de data já chega convertida para datetime e ordenada pelo
+    # carregamento, então o período é localizado por busca binária em vez
+    # de varrer a coluna inteira com uma máscara booleana
+    values = df[date_column].to_numpy()
+    if len(values) and df[date_column].is_monotonic_increasing:
+        lo = values.searchsorted(np.datetime64(start_date, 'ns'), side='left')
+        hi = values.searchsorted(np.datetime64(end_date, 'ns'), side='right')
+        return df.iloc[lo:hi]
 
-    # Detecta o formato da data e converte para datetime
-    # Verifica se a coluna é do tipo string
-    if pd.api.types.is_string_dtype(filtered_df[date_column]):
-        # Tenta diferentes formatos de data
-        try:
-            # Formato: "2025-04-13 14:2" conforme visto na nova estrutura
-            filtered_df[date_column] = pd.to_datetime(filtered_df[date_column], errors='coerce')
-        except:
-            st.warning(f"Não foi possível converter a coluna de data: {date_column}")
-            return pd.DataFrame()
-
-    # Filtra para o período especificado
-    mask = (filtered_df[date_column] >= pd.to_datetime(start_date)) & (
-            filtered_df[date_column] <= pd.to_datetime(end_date))
-    return filtered_df[mask].copy()
+    # Fallback para dataframes que não passaram pelo carregamento padrão
+    mask = (df[date_column] >= pd.to_datetime(start_date)) & (
+            df[date_column] <= pd.to_datetime(end_date))
+    return df[mask]
 
 
 def get_event_stats(sheets_data, start_date, end_date):
@@ -128,78 +273,27 @@ def get_event_stats(sheets_data, start_date, end_date):
         'observadores': 0
     }
 
-    # Conjuntos para rastrear elementos únicos
-    unique_species = set()
-    unique_checklists = set()
-    unique_observers = set()
-
-    # Conjunto para rastrear combinações únicas de espécie+hora (para evitar duplicatas)
-    unique_species_time = set()
-
     # Primeiro verificamos se temos a aba checklists_compilados
     if 'checklists_compilados' in sheets_data:
         obs_df = sheets_data['checklists_compilados']
 
-        # Converter formato de data
-        if 'obsDt' in obs_df.columns and pd.api.types.is_string_dtype(obs_df['obsDt']):
-            try:
-                # Formato na nova estrutura: "2025-04-13 14:2"
-                obs_df['obsDt'] = pd.to_datetime(obs_df['obsDt'], errors='coerce')
-            except:
-                st.warning("Não foi possível converter datas para análise de estatísticas")
-
         # Filtrar para o período selecionado
-        filtered_df = obs_df.copy()
-        if 'obsDt' in filtered_df.columns and pd.api.types.is_datetime64_dtype(filtered_df['obsDt']):
-            mask = (filtered_df['obsDt'] >= pd.to_datetime(start_date)) & (
-                    filtered_df['obsDt'] <= pd.to_datetime(end_date))
-            filtered_df = filtered_df[mask]
+        filtered_df = filter_data_by_date(obs_df, start_date, end_date)
 
-        # Para contar espécies únicas, precisamos considerar combinações de espécie+hora
+        # Conta espécies únicas direto na coluna: o número de espécies
+        # distintas não muda com a desduplicação por horário, então o
+        # nunique (uma passagem em C, sem objetos Python) é equivalente
         if 'speciesCode' in filtered_df.columns:
-            # Iterar pelas linhas para contar espécies únicas considerando o timestamp
-            for _, row in filtered_df.iterrows():
-                species_code = row['speciesCode']
-                obs_dt = row['obsDt']
-
-                # Adiciona a chave espécie+hora para rastrear
-                # Usamos apenas a parte de data+hora, ignorando segundos para maior robustez
-                time_key = obs_dt.strftime('%Y-%m-%d %H:%M')
-                species_time_key = f"{species_code}_{time_key}"
-
-                if species_time_key not in unique_species_time:
-                    unique_species_time.add(species_time_key)
-                    unique_species.add(species_code)
-
+            stats['especies'] = filtered_df['speciesCode'].nunique()
         elif 'commonName' in filtered_df.columns:  # Usar commonName como alternativa
-            # Mesma lógica para commonName
-            for _, row in filtered_df.iterrows():
-                common_name = row['commonName']
-                obs_dt = row['obsDt']
-
-                time_key = obs_dt.strftime('%Y-%m-%d %H:%M')
-                species_time_key = f"{common_name}_{time_key}"
+            stats['especies'] = filtered_df['commonName'].nunique()
 
-                if species_time_key not in unique_species_time:
-                    unique_species_time.add(species_time_key)
-                    unique_species.add(common_name)
-
-        # O resto do código permanece inalterado
-        # Adicionar observadores únicos - sem modificação
-        if 'userDisplayName' in filtered_df.columns:
-            unique_observers.update(filtered_df['userDisplayName'].unique())
-
-        # Adicionar listas únicas - sem modificação
+        # Listas e observadores únicos, também via nunique
         if 'subId' in filtered_df.columns:
-            unique_checklists.update(filtered_df['subId'].unique())
-
-    # O restante da função permanece o mesmo...
-    # (código para manipular 'observations_L2015671' e 'checklists_L2015671')
+            stats['listas'] = filtered_df['subId'].nunique()
 
-    # Preencher estatísticas
-    stats['especies'] = len(unique_species)
-    stats['listas'] = len(unique_checklists)
-    stats['observadores'] = len(unique_observers)
+        if 'userDisplayName' in filtered_df.columns:
+            stats['observadores'] = filtered_df['userDisplayName'].nunique()
 
     return stats
 
@@ -225,26 +319,19 @@ def get_latest_species(sheets_data, start_date, end_date, limit=100):
         st.warning("Não foi encontrada coluna para identificação de espécies")
         return pd.DataFrame()
 
-    # Converte a coluna de data para datetime
-    if pd.api.types.is_string_dtype(df['obsDt']):
-        try:
-            df['obsDt'] = pd.to_datetime(df['obsDt'], errors='coerce')
-        except:
-            st.warning("Não foi possível converter a coluna de data para datetime")
-            return pd.DataFrame()
-
     # Filtra para o período selecionado
     filtered_df = filter_data_by_date(df, start_date, end_date)
 
-    if filtered_df.empty:
+    if len(filtered_df) == 0:
         return pd.DataFrame()
 
-    # Ordena por data (mais recente primeiro) e pega os primeiros registros
-    df_sorted = filtered_df.sort_values('obsDt', ascending=False)
-    latest = df_sorted.head(limit)
+    # Seleciona os registros mais recentes sem ordenar o dataframe inteiro
+    latest = filtered_df.nlargest(limit, 'obsDt')
 
-    # Seleciona as colunas necessárias
-    cols_to_select = ['obsDt', species_col]
+    # Seleciona as colunas necessárias, preferindo a data já formatada
+    # no carregamento (evita strftime a cada renderização)
+    date_col = 'obsDt_fmt' if 'obsDt_fmt' in latest.columns else 'obsDt'
+    cols_to_select = [date_col, species_col]
 
     # Adiciona nome científico se disponível
     if 'scientificName' in latest.columns:
@@ -254,11 +341,16 @@ def get_latest_species(sheets_data, start_date, end_date, limit=100):
     if 'userDisplayName' in latest.columns:
         cols_to_select.append('userDisplayName')
 
-    result = latest[cols_to_select].copy()
+    result = latest[cols_to_select]
 
-    # Renomeia a coluna para padronizar
+    # Renomeia as colunas para padronizar
+    rename_map = {}
+    if date_col != 'obsDt':
+        rename_map[date_col] = 'obsDt'
     if species_col != 'commonName':
-        result = result.rename(columns={species_col: 'commonName'})
+        rename_map[species_col] = 'commonName'
+    if rename_map:
+        result = result.rename(columns=rename_map)
 
     return result
 
@@ -282,38 +374,32 @@ def get_latest_checklists(sheets_data, start_date, end_date, limit=100):
         st.warning("Colunas obsDt e/ou subId ausentes")
         return pd.DataFrame()
 
-    # Converte a coluna de data para datetime
-    if pd.api.types.is_string_dtype(df['obsDt']):
-        try:
-            df['obsDt'] = pd.to_datetime(df['obsDt'], errors='coerce')
-        except:
-            st.warning("Não foi possível converter a coluna de data para datetime")
-            return pd.DataFrame()
-
     # Filtra para o período selecionado
-    if pd.api.types.is_datetime64_dtype(df['obsDt']):
-        mask = (df['obsDt'] >= pd.to_datetime(start_date)) & (df['obsDt'] <= pd.to_datetime(end_date))
-        filtered_df = df[mask].copy()
-    else:
-        filtered_df = df.copy()
-        st.warning("Filtragem por data não aplicada - formato de data inválido")
+    filtered_df = filter_data_by_date(df, start_date, end_date)
 
     # Verifica se há dados após a filtragem
-    if filtered_df.empty:
+    if len(filtered_df) == 0:
         return pd.DataFrame()
 
     # Se userDisplayName não está disponível, use um valor padrão
     if 'userDisplayName' not in filtered_df.columns:
-        filtered_df['userDisplayName'] = "Observador"
+        filtered_df = filtered_df.assign(userDisplayName="Observador")
 
-    # Agrupa por subId para obter checklists únicos
-    checklists = filtered_df.groupby(['subId', 'obsDt', 'userDisplayName']).size().reset_index(name='num_especies')
+    # Conta espécies por lista com value_counts em uma única chave e junta
+    # os metadados (uma linha por subId) em vez de agrupar por três chaves
+    counts = filtered_df['subId'].value_counts().rename('num_especies')
+    counts = counts[counts > 0]  # categorias sem ocorrência no período
+    meta = filtered_df.drop_duplicates('subId').set_index('subId')[
+        ['obsDt', 'userDisplayName']
+    ]
+    checklists = meta.join(counts).reset_index()
 
-    # Ordena por data (mais recente primeiro)
-    checklists_sorted = checklists.sort_values('obsDt', ascending=False)
+    # Seleciona as listas mais recentes sem ordenar o dataframe inteiro
+    latest = checklists.nlargest(limit, 'obsDt')
 
-    # Pega os primeiros registros
-    latest = checklists_sorted.head(limit)
+    # Formata a data já aqui (no máximo `limit` linhas, dentro do cache do
+    # bundle) em vez de a cada renderização da tabela
+    latest = latest.assign(obsDt=latest['obsDt'].dt.strftime('%d/%m/%Y %H:%M'))
 
     return latest
 
@@ -344,27 +430,22 @@ def get_top_species(sheets_data, start_date, end_date, limit=10):
     # Filtra para o período selecionado
     filtered_df = filter_data_by_date(df, start_date, end_date)
 
-    if filtered_df.empty:
+    if len(filtered_df) == 0:
         return pd.DataFrame()
 
-    # Converter obsDt para datetime se ainda não for
-    if pd.api.types.is_string_dtype(filtered_df['obsDt']):
-        filtered_df['obsDt'] = pd.to_datetime(filtered_df['obsDt'], errors='coerce')
-
-    # Criar coluna de horário simplificado (sem segundos)
-    if pd.api.types.is_datetime64_dtype(filtered_df['obsDt']):
-        filtered_df['time_key'] = filtered_df['obsDt'].dt.strftime('%Y-%m-%d %H:%M')
-    else:
-        st.warning("Não foi possível processar a coluna de data para desduplicação")
-        return pd.DataFrame()
+    # Criar coluna de horário simplificado (sem segundos), sem mutar a fatia;
+    # floor('min') mantém o dtype datetime64 e evita materializar strings
+    filtered_df = filtered_df.assign(time_key=filtered_df['obsDt'].dt.floor('min'))
 
     # Desduplicar registros com base na combinação espécie + horário
     # Isso preserva apenas um registro por espécie em cada horário específico
     unique_df = filtered_df.drop_duplicates(subset=[species_col, 'time_key'])
 
-    # Conta ocorrências por espécie nos dados desduplicados
+    # Conta ocorrências por espécie nos dados desduplicados (em colunas
+    # category o value_counts lista também categorias com contagem zero)
     species_counts = unique_df[species_col].value_counts().reset_index()
     species_counts.columns = ['Espécie', 'Contagem']
+    species_counts = species_counts[species_counts['Contagem'] > 0]
 
     # Pega as top espécies
     top_species = species_counts.head(limit)
@@ -391,7 +472,7 @@ def get_top_observers(sheets_data, start_date, end_date, limit=10):
     # Filtra para o período selecionado
     filtered_df = filter_data_by_date(df, start_date, end_date)
 
-    if filtered_df.empty:
+    if len(filtered_df) == 0:
         return pd.DataFrame()
 
     # Verifica qual coluna usar para contar espécies únicas
@@ -403,14 +484,15 @@ def get_top_observers(sheets_data, start_date, end_date, limit=10):
         # Se não houver coluna de espécie, contamos observações (entradas na tabela)
         observer_counts = filtered_df['userDisplayName'].value_counts().reset_index()
         observer_counts.columns = ['Observador', 'Contagem']
-        return observer_counts.sort_values('Contagem', ascending=False).head(limit)
+        observer_counts = observer_counts[observer_counts['Contagem'] > 0]
+        return observer_counts.nlargest(limit, 'Contagem')
 
     # Para observações, contamos espécies únicas por observador
-    observer_counts = filtered_df.groupby('userDisplayName')[count_column].nunique().reset_index()
+    observer_counts = filtered_df.groupby('userDisplayName', observed=True)[count_column].nunique().reset_index()
     observer_counts.columns = ['Observador', 'Contagem']
 
-    # Pega os top observadores
-    top_observers = observer_counts.sort_values('Contagem', ascending=False).head(limit)
+    # Pega os top observadores (seleção parcial, sem ordenar tudo)
+    top_observers = observer_counts.nlargest(limit, 'Contagem')
 
     return top_observers
 
@@ -433,17 +515,19 @@ def get_top_observers_by_lists(sheets_data, start_date, end_date, limit=10):
     # Filtra para o período selecionado
     filtered_df = filter_data_by_date(df, start_date, end_date)
 
-    if filtered_df.empty:
+    if len(filtered_df) == 0:
         return pd.DataFrame()
 
-    # Contagem de listas únicas por observador
-    # Agrupa por observador e subId para contar listas únicas
-    observer_lists = filtered_df.groupby(['userDisplayName', 'subId']).size().reset_index(name='temp')
-    observer_counts = observer_lists.groupby('userDisplayName').size().reset_index(name='Contagem')
-
-    # Pega os top observadores por número de listas
-    top_observers = observer_counts.sort_values('Contagem', ascending=False).head(limit)
-    top_observers.columns = ['Observador', 'Contagem']
+    # Contagem de listas únicas por observador em uma única passagem;
+    # nlargest na Series seleciona o top antes de montar o dataframe final
+    top_observers = (
+        filtered_df.groupby('userDisplayName', observed=True, sort=False)['subId']
+        .nunique()
+        .nlargest(limit)
+        .rename('Contagem')
+        .reset_index()
+        .rename(columns={'userDisplayName': 'Observador'})
+    )
 
     return top_observers
 
@@ -469,31 +553,23 @@ def get_first_species_records(sheets_data, start_date, end_date, limit=100):
         st.warning("Não foi encontrada coluna para identificação de espécies")
         return pd.DataFrame()
 
-    # Converte a coluna de data para datetime
-    if pd.api.types.is_string_dtype(df['obsDt']):
-        try:
-            df['obsDt'] = pd.to_datetime(df['obsDt'], errors='coerce')
-        except:
-            st.warning("Não foi possível converter a coluna de data para datetime")
-            return pd.DataFrame()
-
     # Filtra para o período selecionado
     filtered_df = filter_data_by_date(df, start_date, end_date)
 
-    if filtered_df.empty:
+    if len(filtered_df) == 0:
         return pd.DataFrame()
 
-    # Ordena por data (mais antiga primeiro)
-    df_sorted = filtered_df.sort_values('obsDt')
-
-    # Identifica o primeiro registro de cada espécie
-    first_records = df_sorted.drop_duplicates(subset=[species_col], keep='first')
+    # O frame já vem ordenado por obsDt do carregamento, então o primeiro
+    # registro de cada espécie é a primeira ocorrência de cada valor
+    first_records = filtered_df.drop_duplicates(subset=[species_col], keep='first')
 
-    # Reordena para mostrar os primeiros registros mais recentes primeiro
-    first_records_sorted = first_records.sort_values('obsDt', ascending=False)
+    # Mantém só os `limit` primeiros registros mais recentes, sem ordenar tudo
+    first_records_sorted = first_records.nlargest(limit, 'obsDt')
 
-    # Seleciona as colunas necessárias
-    cols_to_select = ['obsDt', species_col]
+    # Seleciona as colunas necessárias, preferindo a data já formatada
+    # no carregamento (evita strftime a cada renderização)
+    date_col = 'obsDt_fmt' if 'obsDt_fmt' in first_records_sorted.columns else 'obsDt'
+    cols_to_select = [date_col, species_col]
 
     # Adiciona nome científico se disponível
     if 'scientificName' in first_records_sorted.columns:
@@ -503,11 +579,16 @@ def get_first_species_records(sheets_data, start_date, end_date, limit=100):
     if 'userDisplayName' in first_records_sorted.columns:
         cols_to_select.append('userDisplayName')
 
-    result = first_records_sorted[cols_to_select].head(limit).copy()
+    result = first_records_sorted[cols_to_select]
 
-    # Renomeia a coluna para padronizar
+    # Renomeia as colunas para padronizar
+    rename_map = {}
+    if date_col != 'obsDt':
+        rename_map[date_col] = 'obsDt'
     if species_col != 'commonName':
-        result = result.rename(columns={species_col: 'commonName'})
+        rename_map[species_col] = 'commonName'
+    if rename_map:
+        result = result.rename(columns=rename_map)
 
     return result
 
@@ -535,20 +616,14 @@ def get_all_species(sheets_data, start_date, end_date):
     # Filtra observações para o período selecionado
     filtered_obs = filter_data_by_date(obs_df, start_date, end_date)
 
-    if filtered_obs.empty:
+    if len(filtered_obs) == 0:
         st.warning("Não há observações para o período selecionado.")
         return pd.DataFrame()
 
-    # Converter obsDt para datetime se ainda não for
-    if pd.api.types.is_string_dtype(filtered_obs['obsDt']):
-        filtered_obs['obsDt'] = pd.to_datetime(filtered_obs['obsDt'], errors='coerce')
-
-    # Criar coluna de horário simplificado (sem segundos) para desduplicação
-    if pd.api.types.is_datetime64_dtype(filtered_obs['obsDt']):
-        filtered_obs['time_key'] = filtered_obs['obsDt'].dt.strftime('%Y-%m-%d %H:%M')
-    else:
-        st.warning("Não foi possível processar a coluna de data para desduplicação")
-        return pd.DataFrame()
+    # Criar coluna de horário simplificado (sem segundos) para desduplicação,
+    # sem mutar a fatia compartilhada; floor('min') dedupa em datetime64
+    # nativo em vez de strings
+    filtered_obs = filtered_obs.assign(time_key=filtered_obs['obsDt'].dt.floor('min'))
 
     # Verifica quais colunas estão disponíveis para uso
     columns_to_group = []
@@ -584,36 +659,25 @@ def get_all_species(sheets_data, start_date, end_date):
     unique_obs = filtered_obs.drop_duplicates(subset=[species_col, 'time_key'])
 
     # Obtém espécies únicas e conta ocorrências nos dados desduplicados
-    # Agrupamos pelas colunas disponíveis
-    species_counts = unique_obs.groupby(columns_to_group).size().reset_index(name='Contagens')
-
-    # Renomeia as colunas para padronização
-    column_rename = {}
-    if 'commonName' in columns_to_group:
-        column_rename['commonName'] = 'Nome Comum'
-    elif 'speciesCode' in columns_to_group:
-        column_rename['speciesCode'] = 'Nome Comum'
-
-    if 'scientificName' in columns_to_group:
-        column_rename['scientificName'] = 'Nome Científico'
-
-    if 'familySciName' in columns_to_group:
-        column_rename['familySciName'] = 'Família'
-
-    # Aplicamos a renomeação
-    species_counts = species_counts.rename(columns=column_rename)
-
-    # Ordena por TAXON_ORDER se disponível, ou alfabeticamente pelo nome comum
+    # Agrupamos pelas colunas disponíveis (sort=False: a ordenação final
+    # é por taxonOrder ou nome, não pela chave do groupby)
+    species_counts = unique_obs.groupby(
+        columns_to_group, observed=True, sort=False
+    ).size().reset_index(name='Contagens')
+
+    # Renomeia as colunas para padronização (chaves ausentes são ignoradas)
+    species_counts = species_counts.rename(columns={
+        'commonName': 'Nome Comum',
+        'speciesCode': 'Nome Comum',
+        'scientificName': 'Nome Científico',
+        'familySciName': 'Família'
+    })
+
+    # Ordena por TAXON_ORDER se disponível (já numérico desde o
+    # carregamento), ou alfabeticamente pelo nome comum
     if has_taxon_order:
-        # Converte para numérico para garantir ordenação correta
-        try:
-            species_counts['taxonOrder'] = pd.to_numeric(species_counts['taxonOrder'], errors='coerce')
-            species_counts = species_counts.sort_values('taxonOrder').drop(columns=['taxonOrder'])
-        except:
-            # Se falhar a conversão, ordena pelo nome comum
-            species_counts = species_counts.sort_values('Nome Comum')
+        species_counts = species_counts.sort_values('taxonOrder').drop(columns=['taxonOrder'])
     else:
-        # Ordena alfabeticamente pelo nome comum se não tiver taxonOrder
         species_counts = species_counts.sort_values('Nome Comum')
 
     return species_counts
@@ -637,15 +701,12 @@ def get_daily_trend(sheets_data, start_date, end_date):
     # Filtra para o período selecionado
     filtered_df = filter_data_by_date(df, start_date, end_date)
 
-    if filtered_df.empty:
+    if len(filtered_df) == 0:
         return pd.DataFrame()
 
-    # Extrai apenas a data (sem hora)
-    if pd.api.types.is_datetime64_dtype(filtered_df['obsDt']):
-        filtered_df['data'] = filtered_df['obsDt'].dt.date
-    else:
-        st.warning("A coluna de data não está no formato datetime")
-        return pd.DataFrame()
+    # Extrai apenas o dia mantendo o tipo datetime64 (dt.date criaria um
+    # objeto Python por linha e forçaria o groupby a hashear objetos)
+    filtered_df = filtered_df.assign(data=filtered_df['obsDt'].dt.floor('D'))
 
     # Verifica qual coluna usar para espécies
     if 'speciesCode' in filtered_df.columns:
@@ -659,15 +720,12 @@ def get_daily_trend(sheets_data, start_date, end_date):
         daily_obs['num_especies'] = 0  # Colocamos zero como placeholder
         return daily_obs
 
-    # Agrupa por dia e conta espécies e observações
-    daily_species = filtered_df.groupby('data')[species_col].nunique().reset_index()
-    daily_species.columns = ['data', 'num_especies']
-
-    daily_obs = filtered_df.groupby('data').size().reset_index()
-    daily_obs.columns = ['data', 'num_observacoes']
-
-    # Mescla os dataframes
-    daily_trend = daily_species.merge(daily_obs, on='data')
+    # Agrupa por dia e conta espécies e observações em uma única passagem
+    daily_trend = (
+        filtered_df.groupby('data', observed=True)
+        .agg(num_especies=(species_col, 'nunique'), num_observacoes=(species_col, 'size'))
+        .reset_index()
+    )
 
     return daily_trend
 
@@ -675,46 +733,42 @@ def get_daily_trend(sheets_data, start_date, end_date):
 # Função para criar gráfico de tendência diária
 def create_daily_trend_chart(df, title):
     """Cria um gráfico de linha para tendência diária"""
-    if df.empty:
+    if len(df) == 0:
         return None
 
-    # Cria gráfico com dois eixos Y
-    fig = go.Figure()
-
-    # Adiciona linha para espécies
-    fig.add_trace(
-        go.Scatter(
-            x=df['data'],
-            y=df['num_especies'],
-            name='Espécies',
-            line=dict(color='#1f77b4', width=3),
-            mode='lines+markers'
-        )
-    )
-
-    # Adiciona linha para observações (eixo Y secundário)
-    fig.add_trace(
-        go.Scatter(
-            x=df['data'],
-            y=df['num_observacoes'],
-            name='Observações',
-            line=dict(color='#ff7f0e', width=3, dash='dot'),
-            mode='lines+markers',
-            yaxis='y2'
+    # Cria gráfico com dois eixos Y numa única chamada: traços e layout no
+    # construtor evitam a revalidação interna de cada add_trace/update_layout
+    # (Scattergl renderiza via WebGL no cliente, bem mais rápido que SVG
+    # quando a série cresce)
+    fig = go.Figure(
+        data=[
+            go.Scattergl(
+                x=df['data'],
+                y=df['num_especies'],
+                name='Espécies',
+                line=dict(color='#1f77b4', width=3),
+                mode='lines+markers'
+            ),
+            go.Scattergl(
+                x=df['data'],
+                y=df['num_observacoes'],
+                name='Observações',
+                line=dict(color='#ff7f0e', width=3, dash='dot'),
+                mode='lines+markers',
+                yaxis='y2'
+            ),
+        ],
+        layout=go.Layout(
+            title=title,
+            xaxis=dict(title='Data'),
+            yaxis=dict(title='Nº de Espécies', side='left', showgrid=False),
+            yaxis2=dict(title='Nº de Observações', side='right', overlaying='y', showgrid=False),
+            legend=dict(x=0.01, y=0.99, bgcolor='rgba(255, 255, 255, 0.7)'),
+            margin=dict(l=10, r=10, t=50, b=10),
+            height=300
         )
     )
 
-    # Configuração do layout
-    fig.update_layout(
-        title=title,
-        xaxis=dict(title='Data'),
-        yaxis=dict(title='Nº de Espécies', side='left', showgrid=False),
-        yaxis2=dict(title='Nº de Observações', side='right', overlaying='y', showgrid=False),
-        legend=dict(x=0.01, y=0.99, bgcolor='rgba(255, 255, 255, 0.7)'),
-        margin=dict(l=10, r=10, t=50, b=10),
-        height=300
-    )
-
     return fig
 
 
@@ -735,85 +789,141 @@ def get_monthly_checklists_history(sheets_data, end_date, months_back=11):
         st.warning(f"Colunas ausentes para calcular histórico mensal")
         return pd.DataFrame()
 
-    # Converte a coluna de data para datetime
-    if pd.api.types.is_string_dtype(df['obsDt']):
-        try:
-            df['obsDt'] = pd.to_datetime(df['obsDt'], errors='coerce')
-        except:
-            st.warning("Não foi possível converter a coluna de data para datetime")
-            return pd.DataFrame()
-
     # Calcula a data de início (months_back meses antes do final)
     end_date_dt = pd.to_datetime(end_date)
     start_date_dt = end_date_dt - pd.DateOffset(months=months_back)
 
-    # Obtém o mês e ano de cada lista (todas as listas, sem filtrar por data)
-    df_copy = df.copy()
-    df_copy['month_year'] = df_copy['obsDt'].dt.to_period('M')
+    # Identifica todas as listas únicas por mês usando a chave mensal
+    # pré-computada no carregamento (datetime64 truncado, sem Period)
+    monthly_lists = df.drop_duplicates(subset=['_month_year', 'subId'])
+
+    # Conta listas únicas por mês (em ordem cronológica)
+    monthly_counts = monthly_lists.groupby('_month_year', sort=True).size()
+
+    # Reindexa sobre a janela densa de meses: alinhamento O(n) que completa
+    # meses sem listas com zero e descarta meses fora da janela, sem o
+    # hash-join de um merge
+    all_months = pd.date_range(start=start_date_dt.normalize().replace(day=1),
+                               end=end_date_dt, freq='MS')
+    complete_df = (
+        monthly_counts.reindex(all_months, fill_value=0).astype(int)
+        .rename_axis('month_year')
+        .reset_index(name='num_checklists')
+    )
 
-    # Identifica todas as listas únicas por mês
-    monthly_lists = df_copy.drop_duplicates(subset=['month_year', 'subId'])
+    # Formata o rótulo apenas nas (no máximo) doze linhas de saída
+    complete_df['month_label'] = complete_df['month_year'].dt.strftime('%b/%Y')
 
-    # Conta listas únicas por mês
-    monthly_counts = monthly_lists.groupby('month_year').size().reset_index(name='num_checklists')
+    return complete_df
 
-    # Filtra para incluir apenas os meses desejados (últimos months_back + mês atual)
-    start_period = pd.Period(start_date_dt, freq='M')
-    end_period = pd.Period(end_date_dt, freq='M')
+# Identificador barato do estado atual dos dados, usado como chave de cache
+def _data_token(sheets_data):
+    """Gera uma chave barata que muda quando os dados carregados mudam"""
+    token = []
+    for name, df in sheets_data.items():
+        last_obs = df['obsDt'].iloc[-1] if 'obsDt' in df.columns and len(df) else None
+        token.append((name, len(df), last_obs))
+    return tuple(token)
 
-    monthly_counts = monthly_counts[
-        (monthly_counts['month_year'] >= start_period) &
-        (monthly_counts['month_year'] <= end_period)
-        ]
 
-    # Converte o período para string para melhor exibição
-    monthly_counts['month_label'] = monthly_counts['month_year'].dt.strftime('%b/%Y')
+# Função que consolida todos os painéis de um período em uma única passagem em cache
+@st.cache_data(ttl=600)
+def compute_panel_bundle(_sheets_data, start_date, end_date, data_token):
+    """Calcula todos os painéis de um período de uma vez, com cache por período.
 
-    # Garante que todos os meses estejam representados, mesmo sem listas
-    all_months = pd.period_range(start=start_date_dt, end=end_date_dt, freq='M')
-    all_months_df = pd.DataFrame({'month_year': all_months})
-    all_months_df['month_label'] = all_months_df['month_year'].dt.strftime('%b/%Y')
+    O prefixo "_" faz o Streamlit não tentar hashear os dataframes; o
+    data_token garante que o cache seja invalidado quando os dados mudam.
 
-    # Mescla para incluir todos os meses
-    complete_df = pd.merge(all_months_df, monthly_counts, on=['month_year', 'month_label'], how='left')
-    complete_df['num_checklists'] = complete_df['num_checklists'].fillna(0).astype(int)
+    As abas são recortadas para o período uma única vez aqui; dentro dos
+    helpers o filter_data_by_date sobre a fatia já recortada degenera em
+    uma busca binária sem linhas a descartar.
+    """
+    windowed = {
+        name: filter_data_by_date(df, start_date, end_date) if 'obsDt' in df.columns else df
+        for name, df in _sheets_data.items()
+    }
 
-    # Ordena cronologicamente
-    complete_df = complete_df.sort_values('month_year')
+    return {
+        'stats': get_event_stats(windowed, start_date, end_date),
+        'top_species': get_top_species(windowed, start_date, end_date, limit=10),
+        'top_observers': get_top_observers(windowed, start_date, end_date, limit=10),
+        'top_observers_lists': get_top_observers_by_lists(windowed, start_date, end_date, limit=10),
+        'first_species': get_first_species_records(windowed, start_date, end_date, limit=100),
+        'latest_species': get_latest_species(windowed, start_date, end_date, limit=100),
+        'latest_checklists': get_latest_checklists(windowed, start_date, end_date, limit=100),
+        'all_species': get_all_species(windowed, start_date, end_date),
+        # O histórico mensal precisa dos doze meses completos, não só do
+        # período do evento
+        'monthly_history': get_monthly_checklists_history(_sheets_data, end_date, months_back=11),
+    }
+
+
+# Estatísticas de um único dia, em cache: os painéis por dia chamam isto
+# várias vezes por rerun com os mesmos argumentos
+@st.cache_data(ttl=600, show_spinner=False)
+def compute_day_stats(_sheets_data, day_start, day_end, data_token):
+    """Top espécies de um dia, com cache por (day_start, day_end)"""
+    return {
+        'top_species': get_top_species(_sheets_data, day_start, day_end, limit=5),
+    }
+
+
+@st.cache_data(ttl=600, show_spinner=False)
+def compute_daily_metrics(_sheets_data, start_date, end_date, data_token):
+    """Métricas de todos os dias do evento em um único groupby.
+
+    Um agg sobre a data normalizada substitui um par filtro+nunique por dia:
+    uma passagem pelos dados em vez de uma por dia do evento.
+    """
+    if 'checklists_compilados' in _sheets_data:
+        df = _sheets_data['checklists_compilados']
+    elif 'observations_L2015671' in _sheets_data:
+        df = _sheets_data['observations_L2015671']
+    else:
+        return pd.DataFrame(columns=['especies', 'listas', 'observadores'])
+
+    filtered = filter_data_by_date(df, start_date, end_date)
+    if len(filtered) == 0:
+        return pd.DataFrame(columns=['especies', 'listas', 'observadores'])
+
+    species_col = 'speciesCode' if 'speciesCode' in filtered.columns else 'commonName'
+    return filtered.groupby(filtered['obsDt'].dt.normalize(), observed=True).agg(
+        especies=(species_col, 'nunique'),
+        listas=('subId', 'nunique'),
+        observadores=('userDisplayName', 'nunique'),
+    )
 
-    return complete_df
 
 # Função para criar gráfico de histórico mensal
+@st.cache_resource(hash_funcs={
+    pd.DataFrame: lambda d: pd.util.hash_pandas_object(d, index=True).values.tobytes()
+})
 def create_monthly_history_chart(df, title):
-    """Cria um gráfico de linha suave para o histórico mensal de listas"""
-    if df.empty:
+    """Cria um gráfico de linha suave para o histórico mensal de listas.
+
+    A figura fica em cache por conteúdo do dataframe: reruns sem dados
+    novos pulam a construção e a serialização do Plotly.
+    """
+    if len(df) == 0:
         return None
 
     # Cria o gráfico com Plotly
     fig = go.Figure()
 
-    # Adiciona a linha suave
+    # Linha suave com a área sombreada na mesma série: um único traço
+    # carrega os arrays x/y uma vez só para o navegador
     fig.add_trace(
         go.Scatter(
             x=df['month_label'],
             y=df['num_checklists'],
-            name='Listas',  # Este nome não aparecerá, pois a legenda está desativada
             line=dict(color='#2E86C1', width=4, shape='spline'),  # Linha suave usando spline
             mode='lines+markers',
-            marker=dict(size=8, color='#2874A6'),
-            showlegend=False  # Remove esta série da legenda
-        )
-    )
-
-    # Adiciona uma área sombreada abaixo da linha para efeito visual
-    fig.add_trace(
-        go.Scatter(
-            x=df['month_label'],
-            y=df['num_checklists'],
-            name='Área',
+            # Destaca o mês atual (último ponto) direto no marcador, sem a
+            # camada de shapes do Plotly
+            marker=dict(size=[8] * (len(df) - 1) + [12],
+                        color=['#2874A6'] * (len(df) - 1) + ['#FFC107']),
             fill='tozeroy',
             fillcolor='rgba(46, 134, 193, 0.2)',
-            line=dict(width=0),
             showlegend=False  # Remove esta série da legenda
         )
     )
@@ -832,541 +942,620 @@ def create_monthly_history_chart(df, title):
         height=300,
         plot_bgcolor='rgba(0, 0, 0, 0)',  # Transparente - IMPORTANTE
         paper_bgcolor='rgba(0, 0, 0, 0)',  # Transparente - IMPORTANTE
-        hovermode='x unified',
+        hovermode='x',  # tooltip simples; o unificado custa mais no plotly.js
         showlegend=False  # Remove toda a legenda
     )
 
-    # Destaca o mês atual (último mês) - com cor que funciona em temas escuros
-    last_month_index = len(df) - 1
-    if last_month_index >= 0:
-        fig.add_shape(
-            type="rect",
-            x0=last_month_index - 0.4,
-            x1=last_month_index + 0.4,
-            y0=0,
-            y1=df['num_checklists'].iloc[-1] * 1.1,
-            fillcolor="rgba(255, 193, 7, 0.3)",  # Amarelo mais vibrante e transparência ajustada
-            line=dict(width=0),
-            layer="below"
-        )
 
     return fig
 
-# Função principal
-def main():
-    # Título principal
-    st.title("Passarinhômetro - Avistar 2025 no Jardim Botânico de São Paulo")
-    st.markdown("### Passarinhos e Passarinhantes registrados durante o evento")
+# Imagens do carrossel de aves (estáticas)
+AVE_SLIDES = (
+    ("foto: Letícia Souza", "https://i.imgur.com/lvhGWz7.jpeg"),
+    ("foto: Camila Siqueira", "https://i.imgur.com/HhLNccu.jpeg"),
+    ("foto: Camila Siqueira", "https://i.imgur.com/WTEQKqz.jpeg"),
+    ("foto: Camila Siqueira", "https://i.imgur.com/1aPLmUu.jpeg"),
+)
 
-    # Carregar dados
-    if sheet_url and "https://docs.google.com/spreadsheets" in sheet_url:
-        with st.spinner("Carregando dados do Google Sheets..."):
-            sheets_data = load_google_sheet_data(sheet_url)
+
+def _imgur_resized(url, size='h'):
+    """Variante redimensionada de uma imagem do Imgur ('h' = até 1024px).
+
+    O carrossel exibe ~500px de altura, então baixar o JPEG original em
+    resolução máxima desperdiça banda e tempo de decodificação.
+    """
+    if 'imgur.com' in url and '.' in url.rsplit('/', 1)[-1]:
+        base, ext = url.rsplit('.', 1)
+        return f"{base}{size}.{ext}"
+    return url
+
+
+def _carousel_html():
+    """Monta o carrossel como HTML nativo com scroll-snap e lazy-loading"""
+    slides = []
+    for i, (legenda, img) in enumerate(AVE_SLIDES):
+        # Apenas o primeiro slide carrega de imediato; os demais só são
+        # baixados quando entram na área visível
+        loading = "eager" if i == 0 else "lazy"
+        slides.append(
+            f'<div class="slide">'
+            f'<img src="{_imgur_resized(img)}" loading="{loading}" decoding="async" alt="{legenda}">'
+            f'<span class="legenda">{legenda}</span>'
+            f'</div>'
+        )
+
+    # Pré-carrega somente o primeiro slide, que é o visível ao abrir a página
+    preload = f'<link rel="preload" as="image" href="{_imgur_resized(AVE_SLIDES[0][1])}">'
+
+    return f"""
+    {preload}
+    <style>
+        .carrossel {{
+            display: flex;
+            overflow-x: auto;
+            scroll-snap-type: x mandatory;
+            scroll-behavior: smooth;
+            gap: 8px;
+            height: 500px;
+        }}
+        .carrossel .slide {{
+            position: relative;
+            flex: 0 0 100%;
+            scroll-snap-align: start;
+        }}
+        .carrossel img {{
+            width: 100%;
+            height: 100%;
+            object-fit: cover;
+            border-radius: 8px;
+        }}
+        .carrossel .legenda {{
+            position: absolute;
+            left: 12px;
+            bottom: 12px;
+            padding: 2px 8px;
+            border-radius: 4px;
+            background: rgba(0, 0, 0, 0.5);
+            color: #fff;
+            font-family: sans-serif;
+            font-size: 0.8rem;
+        }}
+    </style>
+    <div class="carrossel">{''.join(slides)}</div>
+    """
+
+
+# Painéis renderizados como fragmentos: uma interação dentro de um painel
+# reexecuta apenas aquele fragmento, e não o script inteiro
+def _progress_cfg(text_col, bar_label, max_val):
+    """Config compartilhada das tabelas de ranking com barra de progresso"""
+    return {
+        text_col: st.column_config.TextColumn(text_col, width="small"),
+        "Contagem": st.column_config.ProgressColumn(
+            bar_label,
+            format="%d",
+            min_value=0,
+            max_value=max_val,
+            width="small"
+        )
+    }
+
+
+@st.fragment
+def render_painel_geral(event_stats, panel_bundle):
+    """Coluna 1: métricas gerais e rankings do período"""
+    st.subheader("Resultados Gerais")
+
+    # Usando métricas com bordas em vez dos gráficos gauge
+    st.metric(
+        label="Espécies",
+        value=event_stats['especies'],
+        border=True
+    )
+
+    st.metric(
+        label="Listas",
+        value=event_stats['listas'],
+        border=True
+    )
+
+    st.metric(
+        label="Passarinhantes",
+        value=event_stats['observadores'],
+        border=True
+    )
+
+    st.divider()
+
+    # Top espécies
+    st.subheader(f"Top Espécies")
+    top_species = panel_bundle['top_species']
+
+    # Redução calculada uma vez, acima do branch (1 evita barra vazia
+    # no caso degenerado)
+    max_val = int(top_species["Contagem"].max()) if not top_species.empty else 1
+
+    # Dentro da seção "Top Espécies"
+    if not top_species.empty:
+        st.dataframe(
+            top_species,
+            hide_index=True,
+            use_container_width=True,
+            column_config=_progress_cfg("Espécie", "Núm. de espécies", max_val)
+        )
     else:
-        st.warning("URL da planilha inválido ou não fornecido.")
-        sheets_data = {}
+        st.info("Não há dados suficientes para gerar o ranking de espécies.")
 
-    # Verificar se temos dados
-    if not sheets_data:
-        st.error("Não foi possível carregar os dados da planilha.")
-        return
+    st.divider()
 
-    # Obter estatísticas para o período selecionado
-    with st.spinner("Calculando estatísticas..."):
-        # Verificar qual aba estamos usando
-        event_stats = get_event_stats(sheets_data, start_datetime, end_datetime)
+    # Top observadores
+    st.subheader(f"Top Passarinhantes por Espécies")
+    top_observers = panel_bundle['top_observers']
 
+    max_val = int(top_observers["Contagem"].max()) if not top_observers.empty else 1
 
-    # Layout principal: três colunas
-    col1, col2, col3 = st.columns([1, 2, 1])
+    # Dentro da seção "Top Observadores"
+    if not top_observers.empty:
+        st.dataframe(
+            top_observers,
+            hide_index=True,
+            use_container_width=True,
+            column_config=_progress_cfg("Observador", "Núm. de espécies", max_val)
+        )
+    else:
+        st.info("Não há dados suficientes para gerar o ranking de observadores.")
 
-    # Coluna 1: Painel geral e métricas
-    with col1:
-        st.subheader("Resultados Gerais")
+    st.divider()
+
+    # Top observadores por listas
+    st.subheader(f"Top Passarinhantes por Listas")
+    top_observers_lists = panel_bundle['top_observers_lists']
+
+    max_val = int(top_observers_lists["Contagem"].max()) if not top_observers_lists.empty else 1
 
-        # Usando métricas com bordas em vez dos gráficos gauge
-        st.metric(
-            label="Espécies",
-            value=event_stats['especies'],
-            border=True
+    # Dentro da seção "Top Observadores por Listas"
+    if not top_observers_lists.empty:
+        st.dataframe(
+            top_observers_lists,
+            hide_index=True,
+            use_container_width=True,
+            column_config=_progress_cfg("Observador", "Listas", max_val)
         )
+    else:
+        st.info("Não há dados suficientes para gerar o ranking de observadores por listas.")
+
+
+@st.fragment
+def render_painel_central(panel_bundle):
+    """Coluna 2: carrossel, últimos registros e tabela de espécies"""
+
+    # SEÇÃO DO CARROSSEL DE AVES
+    st.subheader("Passarinhos e Passarinhantes")
+
+    # Carrossel em HTML/CSS nativo (scroll-snap): sem iframe de componente
+    # customizado nem bundle JS, e as imagens fora da tela só são baixadas
+    # quando o usuário navega até elas (loading="lazy")
+    components.html(_carousel_html(), height=520)
+
+    # Adicionar um divisor após o carrossel
+    st.divider()
+    # Para "Últimas Espécies"
+    st.subheader("Últimas Espécies")
+    first_species = panel_bundle['first_species']
+
+    if not first_species.empty:
+        # Formata para exibição
+        # Renomeia colunas (rename devolve um frame novo compartilhando os
+        # dados; não há por que copiar o frame em cache antes)
+        col_rename = {
+            'obsDt': 'Data do Primeiro Registro',
+            'userDisplayName': 'Passarinhante',
+            'commonName': 'Espécie',
+            'scientificName': 'Nome Científico'
+        }
 
-        st.metric(
-            label="Listas",
-            value=event_stats['listas'],
-            border=True
+        display_first_species = first_species.rename(columns=col_rename)
+
+        # Exibe tabela
+        st.dataframe(
+            display_first_species,
+            hide_index=True,
+            use_container_width=True
         )
+    else:
+        st.info("Não há registros de espécies para o período selecionado.")
+
+    st.divider()
+
+    # Para "Últimos Registros"
+    st.subheader("Últimos Registros")
+    latest_species = panel_bundle['latest_species']
+
+    if not latest_species.empty:
+        # Renomeia colunas (rename devolve um frame novo compartilhando os
+        # dados; não há por que copiar o frame em cache antes)
+        col_rename = {
+            'obsDt': 'Data',
+            'userDisplayName': 'Passarinhante',
+            'commonName': 'Espécie',
+            'scientificName': 'Nome Científico'
+        }
+
+        display_species = latest_species.rename(columns=col_rename)
 
-        st.metric(
-            label="Passarinhantes",
-            value=event_stats['observadores'],
-            border=True
+        # Exibe tabela
+        st.dataframe(
+            display_species,
+            hide_index=True,
+            use_container_width=True
         )
+    else:
+        st.info("Não há registros de espécies para o período selecionado.")
 
-        st.divider()
-        
-        # Top espécies
-        st.subheader(f"Top Espécies")
-        top_species = get_top_species(sheets_data, start_datetime, end_datetime, limit=10)
-
-        # Dentro da seção "Top Espécies"
-        if not top_species.empty:
-            st.dataframe(
-                top_species,
-                hide_index=True,
-                use_container_width=True,
-                column_config={
-                    "Espécie": st.column_config.TextColumn("Espécie", width="small"),
-                    "Contagem": st.column_config.ProgressColumn(
-                        "Núm. de espécies",
-                        format="%d",
-                        min_value=0,
-                        max_value=max(top_species["Contagem"]),
-                        width="small"
-                    )
-                }
-            )
-        else:
-            st.info("Não há dados suficientes para gerar o ranking de espécies.")
-
-        st.divider()
-        
-        # Top observadores
-        st.subheader(f"Top Passarinhantes por Espécies")
-        top_observers = get_top_observers(sheets_data, start_datetime, end_datetime, limit=10)
-
-        # Dentro da seção "Top Observadores"
-        if not top_observers.empty:
-            st.dataframe(
-                top_observers,
-                hide_index=True,
-                use_container_width=True,
-                column_config={
-                    "Observador": st.column_config.TextColumn("Observador", width="small"),
-                    "Contagem": st.column_config.ProgressColumn(
-                        "Núm. de espécies",
-                        format="%d",
-                        min_value=0,
-                        max_value=max(top_observers["Contagem"]),
-                        width="small"
-                    )
-                }
+    st.divider()
+
+    # Últimas listas
+    st.subheader("Últimas Listas")
+    latest_checklists = panel_bundle['latest_checklists']
+
+    if not latest_checklists.empty:
+        # Renomeia colunas
+        columns_map = {
+            'obsDt': 'Data',
+            'subId': 'ID da Lista',
+            'userDisplayName': 'Passarinhante',
+            'num_especies': 'Nº Espécies'
+        }
+
+        # Projeta apenas as colunas exibidas antes de renomear
+        display_checklists = latest_checklists[list(columns_map)].rename(columns=columns_map)
+
+        # Exibe tabela
+        st.dataframe(
+            display_checklists,
+            hide_index=True,
+            use_container_width=True
+        )
+    else:
+        st.info("Não há registros de listas para o período selecionado.")
+
+    st.divider()
+
+    # Na seção onde exibimos a tabela de espécies
+    st.subheader("Todas as Espécies Registradas")
+    all_species = panel_bundle['all_species']
+
+    if not all_species.empty:
+        # Configura as colunas dependendo do que está disponível no dataframe
+        column_config = {
+            "Nome Comum": st.column_config.TextColumn("Nome da Ave", width="medium"),
+            "Contagens": st.column_config.NumberColumn("Registros", width="small")
+        }
+
+        # Adiciona configuração para Nome Científico e Família se estiverem disponíveis
+        if "Nome Científico" in all_species.columns:
+            column_config["Nome Científico"] = st.column_config.TextColumn(
+                "Nome Científico",
+                width="medium",
+                help="Nome científico da espécie"
             )
-        else:
-            st.info("Não há dados suficientes para gerar o ranking de observadores.")
-
-        st.divider()
-        
-        # Top observadores por listas
-        st.subheader(f"Top Passarinhantes por Listas")
-        top_observers_lists = get_top_observers_by_lists(sheets_data, start_datetime, end_datetime, limit=10)
-
-        # Dentro da seção "Top Observadores por Listas"
-        if not top_observers_lists.empty:
-            st.dataframe(
-                top_observers_lists,
-                hide_index=True,
-                use_container_width=True,
-                column_config={
-                    "Observador": st.column_config.TextColumn("Observador", width="small"),
-                    "Contagem": st.column_config.ProgressColumn(
-                        "Listas",
-                        format="%d",
-                        min_value=0,
-                        max_value=max(top_observers_lists["Contagem"]),
-                        width="small"
-                    )
-                }
+
+        if "Família" in all_species.columns:
+            column_config["Família"] = st.column_config.TextColumn(
+                "Família",
+                width="medium",
+                help="Família taxonômica"
             )
-        else:
-            st.info("Não há dados suficientes para gerar o ranking de observadores por listas.")
 
+        # Exibe tabela com configuração personalizada
+        st.dataframe(
+            all_species,
+            hide_index=True,
+            use_container_width=True,
+            column_config=column_config
+        )
+    else:
+        st.info("Não há registros de espécies para o período selecionado.")
+
+
+# O mapa é montado a partir de constantes, então o objeto Folium é criado
+# uma única vez por processo e reaproveitado em todos os reruns
+@st.cache_resource
+def _jbsp_map():
+    """Constrói o mapa estático do JB-SP (uma vez por processo)"""
+    # Coordenadas do JB-SP
+    lat_jbsp = -23.6385
+    lon_jbsp = -46.6232
+
+    # Criar mapa com Folium (sem altura explícita)
+    m = folium.Map(location=[lat_jbsp, lon_jbsp], zoom_start=10, tiles='OpenStreetMap')
+
+    # Adicionar marcador e camadas
+    folium.Marker(
+        location=[lat_jbsp, lon_jbsp],
+        popup='Jardim Botânico de São Paulo',
+        icon=folium.Icon(color='green', icon='leaf', prefix='fa')
+    ).add_to(m)
+
+    # Rótulo fixo como DivIcon: um nó de DOM simples em vez de um tooltip
+    # permanente do Leaflet, que reflui a cada pan/zoom
+    folium.map.Marker(
+        location=[lat_jbsp, lon_jbsp],
+        icon=folium.DivIcon(
+            icon_anchor=(-12, 20),
+            html='<div style="font-weight: bold; white-space: nowrap;">'
+                 'PEFI--Jardim Botânico de São Paulo</div>'
+        )
+    ).add_to(m)
 
-    # Coluna 2: Dados principais e tendências
-    with col2:
+    # Camada desligada por padrão: os tiles de satélite só são baixados
+    # se o usuário ativá-la no LayerControl
+    folium.TileLayer('https://mt1.google.com/vt/lyrs=s&x={x}&y={y}&z={z}',
+                    attr='Google Satellite',
+                    name='Google Satellite',
+                    overlay=True,
+                    show=False).add_to(m)
 
-        # SEÇÃO DO CARROSSEL DE AVES
-        st.subheader("Passarinhos e Passarinhantes")
+    folium.LayerControl().add_to(m)
 
-        # Importar o componente
-        from streamlit_carousel import carousel
+    return m
+
+
+@st.cache_data(ttl=86400)
+def _jbsp_map_html():
+    """HTML já renderizado do mapa: o render do Folium (Jinja) roda uma vez"""
+    return _jbsp_map().get_root().render()
+
+
+# CSS do bloco do mapa, montado uma única vez no import; precisa ser
+# reemitido a cada render porque elementos não reemitidos somem da página
+_MAP_CSS = """
+    <style>
+        iframe {
+            height: 500px !important;
+            margin: 0 !important;
+            padding: 0 !important;
+        }
+        div.stFolium {
+            margin-bottom: 0 !important;
+            padding-bottom: 0 !important;
+        }
+    </style>
+"""
+
+
+# O mapa é totalmente estático (coordenadas fixas do JB-SP); como fragmento
+# próprio, interações no resto da página não reconstroem o HTML do Folium
+@st.fragment
+def render_mapa():
+    """Mapa do hotspot do JB-SP (conteúdo estático)"""
+    # Mapa do JB-SP
+    st.subheader("Hotspot")
+
+    # ABORDAGEM DIFERENTE: Remover divisor e usar CSS para controlar o mapa
+    st.markdown(_MAP_CSS, unsafe_allow_html=True)
+
+    # Exibir o HTML em cache direto num iframe: só exibição, sem a ponte
+    # bidirecional do streamlit-folium nem novo render do Jinja por rerun
+    components.html(_jbsp_map_html(), height=500)
+
+
+@st.cache_resource
+def _daily_bar_figure(dias_labels, especies_por_dia, listas_por_dia,
+                      observadores_por_dia):
+    """Gráfico comparativo por dia a partir do formato longo, em cache.
+
+    Recebe tuplas para servirem de chave de cache: a figura só é
+    reconstruída (e re-serializada) quando os valores por dia mudam.
+    """
+    n_dias = len(dias_labels)
+    long_df = pd.DataFrame({
+        'dia': list(dias_labels) * 3,
+        'metrica': (['Espécies'] * n_dias + ['Listas'] * n_dias
+                    + ['Passarinhantes'] * n_dias),
+        'valor': list(especies_por_dia) + list(listas_por_dia)
+                 + list(observadores_por_dia),
+    })
+
+    fig = px.bar(
+        long_df, x='dia', y='valor', color='metrica', barmode='group',
+        color_discrete_map={
+            'Espécies': '#1f77b4',
+            'Listas': '#ff7f0e',
+            'Passarinhantes': '#2ca02c',
+        },
+    )
+
+    # Configurar layout sem título e sem labels nos eixos
+    fig.update_layout(
+        xaxis=dict(title=None),  # Remove o título do eixo X
+        yaxis=dict(title=None),  # Remove o título do eixo Y
+        legend=dict(
+            title=None,  # px usaria o nome da coluna como título da legenda
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="center",
+            x=0.5
+        ),
+        margin=dict(l=10, r=10, t=10, b=10),  # Reduz a margem superior para eliminar espaço do título
+        height=250
+    )
+
+    return fig
 
-        # Definir as imagens para o carrossel
-        ave_slides = [
-            dict(
-                title="",
-                text="foto: Letícia Souza",
-                img="https://i.imgur.com/lvhGWz7.jpeg"
-            ),
-            dict(
-                title="",
-                text="foto: Camila Siqueira",
-                img="https://i.imgur.com/HhLNccu.jpeg"
-            ),
-            dict(
-                title="",
-                text="foto: Camila Siqueira",
-                img="https://i.imgur.com/WTEQKqz.jpeg"
-            ),
-            dict(
-                title="",
-                text="foto: Camila Siqueira",
-                img="https://i.imgur.com/1aPLmUu.jpeg"
-            #),
-            #dict(
-                #title="",
-                #text="foto: Camila Siqueira",
-                #img="https://i.imgur.com/WTEQKqz.jpeg"
-            )
-        ]
 
-        # Exibir o carrossel com 3 segundos de intervalo entre slides
-        carousel(
-            items=ave_slides,
-            interval=2000,  # 3 segundos entre slides
-            container_height=500,  # Altura do contêiner
-            indicators=False,  # Mostrar indicadores (bolinhas)
-            controls=True,  # Mostrar controles (setas)
-            width=1.0,  # Largura total
-            fade=True,
-            wrap=True
+def _day_species_table_html(day_species, max_contagem):
+    """Monta a tabela de top espécies do dia como HTML estático.
+
+    Para meia dúzia de linhas, uma tabela com <progress> nativo evita
+    montar o grid interativo do st.dataframe a cada dia.
+    """
+    linhas = []
+    for especie, contagem in zip(day_species['Espécie'], day_species['Contagem']):
+        linhas.append(
+            f'<tr><td>{html.escape(str(especie))}</td>'
+            f'<td><progress max="{max_contagem}" value="{int(contagem)}" '
+            f'style="width: 100%;"></progress></td>'
+            f'<td style="text-align: right;">{int(contagem)}</td></tr>'
         )
-        # Adicionar um divisor após o carrossel
-        st.divider()
-        # Para "Últimas Espécies"
-        st.subheader("Últimas Espécies")
-        first_species = get_first_species_records(sheets_data, start_datetime, end_datetime, limit=100)
-
-        if not first_species.empty:
-            # Formata para exibição
-            display_first_species = first_species.copy()
-
-            # Renomeia colunas
-            col_rename = {
-                'obsDt': 'Data do Primeiro Registro',
-                'userDisplayName': 'Passarinhante',
-                'commonName': 'Espécie',
-                'scientificName': 'Nome Científico'
-            }
-
-            display_first_species = display_first_species.rename(columns=col_rename)
-
-            # Formata data
-            if pd.api.types.is_datetime64_dtype(display_first_species['Data do Primeiro Registro']):
-                display_first_species['Data do Primeiro Registro'] = display_first_species[
-                    'Data do Primeiro Registro'].dt.strftime('%d/%m/%Y %H:%M')
-
-            # Exibe tabela
-            st.dataframe(
-                display_first_species,
-                hide_index=True,
-                use_container_width=True
-            )
-        else:
-            st.info("Não há registros de espécies para o período selecionado.")
 
-        st.divider()
+    return (
+        '<table style="width: 100%; font-size: 0.85rem;">'
+        '<thead><tr>'
+        '<th style="text-align: left;">Espécie</th>'
+        '<th style="text-align: left;">Registros</th>'
+        '<th></th>'
+        '</tr></thead>'
+        f'<tbody>{"".join(linhas)}</tbody>'
+        '</table>'
+    )
 
-        # Para "Últimos Registros"
-        st.subheader("Últimos Registros")
-        latest_species = get_latest_species(sheets_data, start_datetime, end_datetime, limit=100)
 
-        if not latest_species.empty:
-            # Formata para exibição
-            display_species = latest_species.copy()
+@st.fragment
+def render_painel_diario(sheets_data, panel_bundle):
+    """Coluna 3: mapa, histórico mensal e resultados por dia"""
+    render_mapa()
 
-            # Renomeia colunas
-            col_rename = {
-                'obsDt': 'Data',
-                'userDisplayName': 'Passarinhante',
-                'commonName': 'Espécie',
-                'scientificName': 'Nome Científico'
-            }
+    st.divider()
 
-            display_species = display_species.rename(columns=col_rename)
+    # Próxima seção sem divisor nem espaçador
+    st.subheader("Efeito Avistar")
 
-            # Formata data
-            if pd.api.types.is_datetime64_dtype(display_species['Data']):
-                display_species['Data'] = display_species['Data'].dt.strftime('%d/%m/%Y %H:%M')
+    # Obtém dados históricos de 11 meses + mês atual
+    monthly_history = panel_bundle['monthly_history']
 
-            # Exibe tabela
-            st.dataframe(
-                display_species,
-                hide_index=True,
-                use_container_width=True
-            )
-        else:
-            st.info("Não há registros de espécies para o período selecionado.")
+    if not monthly_history.empty:
+        # Cria o gráfico
+        history_chart = create_monthly_history_chart(
+            monthly_history,
+            "Listas Mensais Submetidas"
+        )
+
+        # Exibe o gráfico
+        if history_chart:
+            st.plotly_chart(history_chart, use_container_width=True)
+    else:
+        st.info("Não há dados históricos suficientes para gerar o gráfico.")
 
-        st.divider()
+    st.divider()
 
-        # Últimas listas
-        st.subheader("Últimas Listas")
-        latest_checklists = get_latest_checklists(sheets_data, start_datetime, end_datetime, limit=100)
+    # NOVA SEÇÃO - Resultados por dia
+    st.subheader("Resultados por dia")
 
-        if not latest_checklists.empty:
-            # Formata para exibição
-            display_checklists = latest_checklists.copy()
+    # Dias do evento derivados do período de análise definido no topo
+    dias_evento = pd.date_range(min_date, max_date, freq='D')
 
-            # Renomeia colunas
-            columns_map = {
-                'obsDt': 'Data',
-                'subId': 'ID da Lista',
-                'userDisplayName': 'Passarinhante',
-                'num_especies': 'Nº Espécies'
-            }
+    # Preparar dados para gráfico comparativo (rótulos formatados em C
+    # pelo date_range em vez de strftime por item em Python)
+    dias_labels = dias_evento.strftime('%d/%m').tolist()
 
-            display_checklists = display_checklists.rename(columns=columns_map)
+    # Métricas de todos os dias em um único groupby (em cache); o reindex
+    # garante zero para dias do evento sem registros
+    daily_metrics = compute_daily_metrics(
+        sheets_data, START_NS, END_NS, _data_token(sheets_data)
+    ).reindex(dias_evento, fill_value=0)
 
-            # Formata data
-            if pd.api.types.is_datetime64_dtype(display_checklists['Data']):
-                display_checklists['Data'] = display_checklists['Data'].dt.strftime('%d/%m/%Y %H:%M')
+    especies_por_dia = daily_metrics['especies'].tolist()
+    listas_por_dia = daily_metrics['listas'].tolist()
+    observadores_por_dia = daily_metrics['observadores'].tolist()
 
-            # Exibe tabela
-            st.dataframe(
-                display_checklists,
-                hide_index=True,
-                use_container_width=True
-            )
-        else:
-            st.info("Não há registros de listas para o período selecionado.")
-
-        st.divider()
-        
-        # Na seção onde exibimos a tabela de espécies
-        st.subheader("Todas as Espécies Registradas")
-        all_species = get_all_species(sheets_data, start_datetime, end_datetime)
-
-        if not all_species.empty:
-            # Configura as colunas dependendo do que está disponível no dataframe
-            column_config = {
-                "Nome Comum": st.column_config.TextColumn("Nome da Ave", width="medium"),
-                "Contagens": st.column_config.NumberColumn("Registros", width="small")
-            }
-
-            # Adiciona configuração para Nome Científico e Família se estiverem disponíveis
-            if "Nome Científico" in all_species.columns:
-                column_config["Nome Científico"] = st.column_config.TextColumn(
-                    "Nome Científico",
-                    width="medium",
-                    help="Nome científico da espécie"
-                )
-
-            if "Família" in all_species.columns:
-                column_config["Família"] = st.column_config.TextColumn(
-                    "Família",
-                    width="medium",
-                    help="Família taxonômica"
-                )
-
-            # Exibe tabela com configuração personalizada
-            st.dataframe(
-                all_species,
-                hide_index=True,
-                use_container_width=True,
-                column_config=column_config
-            )
-        else:
-            st.info("Não há registros de espécies para o período selecionado.")
+    # Criar gráfico de barras comparativo (figura em cache enquanto os
+    # valores por dia não mudarem)
+    fig = _daily_bar_figure(tuple(dias_labels), tuple(especies_por_dia),
+                            tuple(listas_por_dia), tuple(observadores_por_dia))
 
+    # Exibir gráfico
+    st.plotly_chart(fig, use_container_width=True)
 
-    # Coluna 3: Rankings e análises específicas por dia
-    with col3:
-                               # Mapa do JB-SP
-        st.subheader("Hotspot")
-        
-        # Coordenadas do JB-SP
-        lat_jbsp = -23.6385
-        lon_jbsp = -46.6232
-        
-        # Criar mapa com Folium (sem altura explícita)
-        m = folium.Map(location=[lat_jbsp, lon_jbsp], zoom_start=10, tiles='OpenStreetMap')
-        
-        # Adicionar marcador e camadas
-        folium.Marker(
-            location=[lat_jbsp, lon_jbsp],
-            popup='Jardim Botânico de São Paulo',
-            tooltip=folium.Tooltip('PEFI--Jardim Botânico de São Paulo', permanent=True),
-            icon=folium.Icon(color='green', icon='leaf', prefix='fa')
-        ).add_to(m)
-        
-        folium.TileLayer('https://mt1.google.com/vt/lyrs=s&x={x}&y={y}&z={z}',
-                        attr='Google Satellite',
-                        name='Google Satellite').add_to(m)
-        
-        folium.LayerControl().add_to(m)
-        
-        # ABORDAGEM DIFERENTE: Remover divisor e usar CSS para controlar o mapa
-        css = """
-        <style>
-            iframe {
-                height: 500px !important;
-                margin: 0 !important;
-                padding: 0 !important;
-            }
-            div.stFolium {
-                margin-bottom: 0 !important;
-                padding-bottom: 0 !important;
-            }
-        </style>
-        """
-        st.markdown(css, unsafe_allow_html=True)
-        
-        # Exibir mapa (sem altura explícita para o mapa)
-        st_folium(m)
-
-        st.divider()
-        
-        # Próxima seção sem divisor nem espaçador
-        st.subheader("Efeito Avistar")
-
-        # Obtém dados históricos de 11 meses + mês atual
-        monthly_history = get_monthly_checklists_history(sheets_data, end_datetime, months_back=11)
-
-        if not monthly_history.empty:
-            # Cria o gráfico
-            history_chart = create_monthly_history_chart(
-                monthly_history,
-                "Listas Mensais Submetidas"
-            )
+    st.divider()
+
+    # Exibir painéis para cada dia
+    for i, dia in enumerate(dias_evento):
+        # Formatar a data para exibição
+        dia_formatado = dia.strftime('%d/%m/%Y')
+
+        # Título do dia
+        st.markdown(f"#### {dia_formatado}")
+
+        # Reaproveita as métricas do groupby único calculado para o gráfico
+        day_stats = daily_metrics.iloc[i]
+
+        # Exibe estatísticas em métricas com bordas
+        col_a, col_b, col_c = st.columns(3)
+
+        with col_a:
+            st.metric("Espécies", int(day_stats['especies']), border=True)
+
+        with col_b:
+            st.metric("Listas", int(day_stats['listas']), border=True)
+
+        with col_c:
+            st.metric("Passarinhantes", int(day_stats['observadores']), border=True)
+
+        # Top Espécies do Dia (top-5 por dia continua em cache próprio)
+        day_start = dia.normalize()
+        day_end = day_start + pd.Timedelta(days=1) - pd.Timedelta(nanoseconds=1)
+        day_species = compute_day_stats(sheets_data, day_start, day_end,
+                                        _data_token(sheets_data))['top_species']
+
+        if not day_species.empty:
+            # Redução vetorizada, calculada uma vez fora do HTML
+            max_contagem = int(day_species["Contagem"].max())
 
-            # Exibe o gráfico
-            if history_chart:
-                st.plotly_chart(history_chart, use_container_width=True)
+            # Tabela estática com barra de progresso nativa
+            st.markdown(_day_species_table_html(day_species, max_contagem),
+                        unsafe_allow_html=True)
         else:
-            st.info("Não há dados históricos suficientes para gerar o gráfico.")
-
-        st.divider()
-        
-        # NOVA SEÇÃO - Resultados por dia
-        st.subheader("Resultados por dia")
-
-        # Datas fixas para análise
-        dias_evento = [
-            datetime.datetime(2025, 5, 16),
-            datetime.datetime(2025, 5, 17),
-            datetime.datetime(2025, 5, 18)
-        ]
+            st.info(f"Não há registros de espécies para o dia {dia_formatado}.")
 
-        # Preparar dados para gráfico comparativo
-        dias_labels = ["16/05", "17/05", "18/05"]
-        especies_por_dia = []
-        listas_por_dia = []
-        observadores_por_dia = []
-
-        # Coletar estatísticas para cada dia
-        for dia in dias_evento:
-            # Converte para início e fim do dia
-            day_start = datetime.datetime.combine(dia.date(), datetime.time.min)
-            day_end = datetime.datetime.combine(dia.date(), datetime.time.max)
-
-            # Obtém estatísticas do dia
-            day_stats = get_event_stats(sheets_data, day_start, day_end)
-
-            # Armazena dados para o gráfico
-            especies_por_dia.append(day_stats['especies'])
-            listas_por_dia.append(day_stats['listas'])
-            observadores_por_dia.append(day_stats['observadores'])
-
-        # Criar gráfico de barras comparativo
-        fig = go.Figure()
-
-        # Adicionar barras para cada métrica
-        fig.add_trace(go.Bar(
-            x=dias_labels,
-            y=especies_por_dia,
-            name='Espécies',
-            marker_color='#1f77b4'
-        ))
-
-        fig.add_trace(go.Bar(
-            x=dias_labels,
-            y=listas_por_dia,
-            name='Listas',
-            marker_color='#ff7f0e'
-        ))
-
-        fig.add_trace(go.Bar(
-            x=dias_labels,
-            y=observadores_por_dia,
-            name='Passarinhantes',
-            marker_color='#2ca02c'
-        ))
-
-        # Configurar layout sem título e sem labels nos eixos
-        fig.update_layout(
-            barmode='group',
-            xaxis=dict(title=None),  # Remove o título do eixo X
-            yaxis=dict(title=None),  # Remove o título do eixo Y
-            legend=dict(
-                orientation="h",
-                yanchor="bottom",
-                y=1.02,
-                xanchor="center",
-                x=0.5
-            ),
-            margin=dict(l=10, r=10, t=10, b=10),  # Reduz a margem superior para eliminar espaço do título
-            height=250
+        # Adicionar divisor entre os dias
+        if i < len(dias_evento) - 1:
+            st.divider()
+
+
+# Função principal
+def main():
+    # Título principal
+    st.title("Passarinhômetro - Avistar 2025 no Jardim Botânico de São Paulo")
+    st.markdown("### Passarinhos e Passarinhantes registrados durante o evento")
+
+    # Carregar dados
+    if sheet_url and "https://docs.google.com/spreadsheets" in sheet_url:
+        with st.spinner("Carregando dados do Google Sheets..."):
+            sheets_data = load_google_sheet_data(sheet_url, _sheet_revision(sheet_url))
+    else:
+        st.warning("URL da planilha inválido ou não fornecido.")
+        sheets_data = {}
+
+    # Verificar se temos dados
+    if not sheets_data:
+        st.error("Não foi possível carregar os dados da planilha.")
+        return
+
+    # Obter estatísticas para o período selecionado
+    with st.spinner("Calculando estatísticas..."):
+        # Calcula todos os painéis do período de uma só vez (com cache)
+        panel_bundle = compute_panel_bundle(
+            sheets_data, START_NS, END_NS, _data_token(sheets_data)
         )
+        event_stats = panel_bundle['stats']
+
+
+    # Layout principal: três colunas
+    col1, col2, col3 = st.columns([1, 2, 1])
 
-        # Exibir gráfico
-        st.plotly_chart(fig, use_container_width=True)
-
-        st.divider()
-        
-        # Exibir painéis para cada dia
-        for i, dia in enumerate(dias_evento):
-            # Formatar a data para exibição
-            dia_formatado = dia.strftime('%d/%m/%Y')
-
-            # Título do dia
-            st.markdown(f"#### {dia_formatado}")
-
-            # Converte para início e fim do dia
-            day_start = datetime.datetime.combine(dia.date(), datetime.time.min)
-            day_end = datetime.datetime.combine(dia.date(), datetime.time.max)
-
-            # Obtém estatísticas do dia
-            day_stats = get_event_stats(sheets_data, day_start, day_end)
-
-            # Exibe estatísticas em métricas com bordas
-            col_a, col_b, col_c = st.columns(3)
-
-            with col_a:
-                st.metric("Espécies", day_stats['especies'], border=True)
-
-            with col_b:
-                st.metric("Listas", day_stats['listas'], border=True)
-
-            with col_c:
-                st.metric("Passarinhantes", day_stats['observadores'], border=True)
-
-            # Top Espécies do Dia
-            day_species = get_top_species(sheets_data, day_start, day_end, limit=5)
-
-            if not day_species.empty:
-                # Exibir dataframe com barra de progresso
-                st.dataframe(
-                    day_species,
-                    hide_index=True,
-                    use_container_width=True,
-                    column_config={
-                        "Espécie": st.column_config.TextColumn("Espécie", width="small"),
-                        "Contagem": st.column_config.ProgressColumn(
-                            "Registros",
-                            format="%d",
-                            min_value=0,
-                            max_value=max(day_species["Contagem"]),
-                            width="small"
-                        )
-                    }
-                )
-            else:
-                st.info(f"Não há registros de espécies para o dia {dia_formatado}.")
-
-            # Adicionar divisor entre os dias
-            if i < len(dias_evento) - 1:
-                st.divider()
+    # Coluna 1: Painel geral e métricas
+    with col1:
+        render_painel_geral(event_stats, panel_bundle)
+
+    # Coluna 2: Dados principais e tendências
+    with col2:
+        render_painel_central(panel_bundle)
+
+    # Coluna 3: Rankings e análises específicas por dia
+    with col3:
+        render_painel_diario(sheets_data, panel_bundle)
 
     # Rodapé
     st.markdown("---")